@@ -1,23 +1,27 @@
 import argparse
 import os
+import re
+import tempfile
 from datetime import datetime
-from uuid import uuid4
+from itertools import chain, groupby, permutations
+from operator import attrgetter
 from flask import Flask, render_template, request, redirect, url_for, flash, send_file, abort, current_app
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash
 from dotenv import load_dotenv
-from io import BytesIO
+import numpy as np
 import pandas as pd
+import xlsxwriter
 from config import Config
 from models import (
     db, User, Student, Rubric, RubricItem, EvalRound,
-    EvaluationToken, EvaluationResponse, DevOutbox, Course
+    EvaluationToken, EvaluationResponse, DevOutbox, Course, dialect_insert
 )
-from mailer import send_email
-from nlp import detect_red_flags, simple_summarize, openai_summarize
-from scoring import compute_weighted_percentage, aggregate_scores_df, apply_curve_scores
+from mailer import send_email, send_emails_bulk
+from nlp import detect_red_flags, simple_summarize, openai_summarize_batch
+from scoring import aggregate_scores_df, apply_curve_scores, compute_weighted_percentages
 from flask_wtf.csrf import CSRFProtect, generate_csrf
-from sqlalchemy import or_, text
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 
 load_dotenv()
@@ -88,6 +92,107 @@ PREBUILT_RUBRIC_ITEMS = [
     },
 ]
 
+# Column values for the prebuilt template, coerced once; only rubric_id varies per insert
+PREBUILT_RUBRIC_INSERT_ROWS = tuple(
+    {
+        "criterion": it["criterion"],
+        "description": it["description"],
+        "weight": float(it["weight"]),
+        "max_score": int(it["max_score"]),
+    }
+    for it in PREBUILT_RUBRIC_ITEMS
+)
+
+# Rows per page on list views
+PAGE_SIZE = 50
+
+# Columns the student list templates render; everything else stays unloaded
+STUDENT_LIST_COLUMNS = (Student.id, Student.first_name, Student.last_name, Student.email, Student.team)
+
+# pyarrow's multithreaded CSV reader when installed, pandas' C parser otherwise
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Rows parsed per chunk when streaming a roster upload; bounds memory to one chunk
+CSV_CHUNK_ROWS = 10_000
+
+# Rows per multi-VALUES upsert; keeps bound parameters under SQLite's variable limit
+UPSERT_BATCH_SIZE = 200
+
+# Joins comments inside SQL aggregates; a control character no form input will contain
+COMMENT_SEP = "\x1e"
+
+# Reports larger than this spill from memory to a temp file while being written and sent
+REPORT_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+# "- Evaluate <name>: <url>" lines in round-start emails, parsed for the outbox quick-open buttons
+_OUTBOX_LINK_RE = re.compile(r"-\s*Evaluate\s+([^:]+):\s*(https?://\S+)")
+
+def _string_agg(column, sep):
+    """Dialect-appropriate string aggregate (string_agg on Postgres, group_concat elsewhere)."""
+    if db.engine.dialect.name == "postgresql":
+        return func.string_agg(column, sep)
+    return func.group_concat(column, sep)
+
+def _form_score(raw, max_score):
+    """Parse a submitted criterion score; junk counts as 0 and the result is clamped to [0, max_score]."""
+    try:
+        val = int(raw or 0)
+    except ValueError:
+        val = 0
+    return max(0, min(max_score, val))
+
+def _write_sheet(wb, title, header, rows):
+    """Write a header row and data rows, in order, to a new sheet of a constant-memory workbook."""
+    ws = wb.add_worksheet(title)
+    ws.write_row(0, 0, header)
+    for row_num, values in enumerate(rows, start=1):
+        ws.write_row(row_num, 0, values)
+
+def _read_upload_csv(file):
+    """Parse an uploaded CSV as all-string columns; returns None for an empty file.
+
+    Raises pandas.errors.ParserError for a file that cannot be parsed.
+    """
+    options = {"dtype": str, "keep_default_na": False, "encoding": "utf-8"}
+    if CSV_ENGINE == "pyarrow":
+        try:
+            return pd.read_csv(file.stream, engine="pyarrow", **options)
+        except pd.errors.ParserError:
+            # pyarrow rejects ragged rows (e.g. Excel's trailing commas) and empty files;
+            # reparse with the C parser, which accepts the former and reports the latter
+            file.stream.seek(0)
+    try:
+        # index_col=False keeps a trailing comma from shifting every field one column left
+        return pd.read_csv(file.stream, index_col=False, **options)
+    except pd.errors.EmptyDataError:
+        return None
+
+def _iter_upload_csv(file, chunksize=None):
+    """Yield an uploaded CSV as all-string DataFrames of at most chunksize rows; nothing for an empty file."""
+    chunksize = chunksize or CSV_CHUNK_ROWS
+    try:
+        # pandas cannot chunk with the pyarrow engine, so streaming always uses the C parser;
+        # index_col=False keeps a trailing comma from shifting every field one column left
+        reader = pd.read_csv(
+            file.stream, dtype=str, keep_default_na=False, encoding="utf-8", index_col=False, chunksize=chunksize
+        )
+    except (pd.errors.EmptyDataError, pd.errors.ParserError):
+        return
+    with reader:
+        yield from reader
+
+def _student_rows(df):
+    """Normalize an uploaded student roster column-wise into insertable dicts, one per email."""
+    df = df[["first_name", "last_name", "email", "team"]].apply(lambda col: col.str.strip())
+    df["email"] = df["email"].str.lower()
+    # A repeated email updates the earlier row
+    df = df[df["email"] != ""].drop_duplicates("email", keep="last")
+    return df.to_dict("records")
+
 def create_app():
     app = Flask(__name__, instance_relative_config=True, template_folder="templates", static_folder="static")
 
@@ -116,11 +221,22 @@ def create_app():
     app.config.from_object(Config)
     os.makedirs(app.instance_path, exist_ok=True)
 
+    # Outside debug mode, never re-stat templates and keep compiled bytecode across restarts
+    if not app.debug:
+        from jinja2 import FileSystemBytecodeCache
+        app.config["TEMPLATES_AUTO_RELOAD"] = False
+        app.jinja_env.auto_reload = False
+        jinja_cache_dir = os.path.join(app.instance_path, "jinja_cache")
+        os.makedirs(jinja_cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+
     # CSRF protection for all POST forms
     CSRFProtect(app)
 
     @app.context_processor
     def inject_csrf_token():
+        # generate_csrf signs the token once per request and caches it on g,
+        # so repeated {{ csrf_token() }} calls in a template are just a lookup
         return {"csrf_token": generate_csrf}
 
     db.init_app(app)
@@ -146,6 +262,8 @@ def create_app():
             password = request.form.get("password", "").strip()
             user = User.query.filter_by(email=email).first()
             if user and user.check_password(password):
+                # Persist the hash if check_password just upgraded it
+                db.session.commit()
                 login_user(user)
                 return redirect(url_for("dashboard"))
             flash("Invalid credentials.", "danger")
@@ -223,11 +341,12 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
     @app.route("/dashboard")
     @login_required
     def dashboard():
-        rounds = EvalRound.query.order_by(EvalRound.created_at.desc()).all()
+        page = request.args.get("page", 1, type=int)
+        pagination = EvalRound.query.order_by(EvalRound.created_at.desc()).paginate(page=page, per_page=PAGE_SIZE, error_out=False)
         students_count = Student.query.count()
         courses_count = Course.query.count()
-        rubrics = Rubric.query.all()
-        return render_template("dashboard.html", rounds=rounds, students_count=students_count, courses_count=courses_count, rubrics=rubrics)
+        rubrics_count = Rubric.query.count()
+        return render_template("dashboard.html", rounds=pagination.items, pagination=pagination, students_count=students_count, courses_count=courses_count, rubrics_count=rubrics_count)
 
     @app.route("/students")
     @login_required
@@ -243,42 +362,45 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
                 flash("Please choose a CSV file.", "warning")
                 return redirect(request.url)
 
-            import csv, io
-            decoded = file.stream.read().decode("utf-8")
-            reader = csv.DictReader(io.StringIO(decoded))
+            chunks = _iter_upload_csv(file)
             required = {"first_name", "last_name", "email", "team"}
-            if not required.issubset(set(reader.fieldnames or [])):
-                flash(f"CSV must include columns: {', '.join(required)}", "danger")
+            # Upsert on the unique email so existing students (and their tokens) are kept;
+            # a later chunk repeating an email simply updates the row again
+            count = 0
+            try:
+                first = next(chunks, None)
+                if first is None or not required.issubset(first.columns):
+                    flash(f"CSV must include columns: {', '.join(required)}", "danger")
+                    return redirect(request.url)
+                for df in chain([first], chunks):
+                    rows = _student_rows(df)
+                    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                        stmt = dialect_insert(Student).values(rows[start:start + UPSERT_BATCH_SIZE])
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["email"],
+                            set_={
+                                "first_name": stmt.excluded.first_name,
+                                "last_name": stmt.excluded.last_name,
+                                "team": stmt.excluded.team,
+                            },
+                        )
+                        db.session.execute(stmt)
+                    count += len(rows)
+            except pd.errors.ParserError:
+                db.session.rollback()
+                flash("Could not parse the CSV file; no students were changed.", "danger")
                 return redirect(request.url)
-
-            # Global replace (legacy behavior)
-            Student.query.delete()
             db.session.commit()
-
-            added = 0
-            for row in reader:
-                email = row["email"].strip().lower()
-                if not email:
-                    continue
-                exists = Student.query.filter_by(email=email).first()
-                if exists:
-                    exists.first_name = row["first_name"].strip()
-                    exists.last_name = row["last_name"].strip()
-                    exists.team = row["team"].strip()
-                else:
-                    s = Student(
-                        first_name=row["first_name"].strip(),
-                        last_name=row["last_name"].strip(),
-                        email=email,
-                        team=row["team"].strip(),
-                    )
-                    db.session.add(s)
-                    added += 1
-            db.session.commit()
-            flash(f"Upload complete. {added} students added.", "success")
+            flash(f"Upload complete. {count} students added or updated.", "success")
             return redirect(url_for("upload_students"))
-        all_students = Student.query.order_by(Student.last_name, Student.first_name).all()
-        return render_template("upload_students.html", students=all_students)
+        page = request.args.get("page", 1, type=int)
+        pagination = (
+            Student.query
+            .options(load_only(*STUDENT_LIST_COLUMNS))
+            .order_by(Student.last_name, Student.first_name)
+            .paginate(page=page, per_page=PAGE_SIZE, error_out=False)
+        )
+        return render_template("upload_students.html", students=pagination.items, pagination=pagination)
 
     @app.route("/courses", methods=["GET", "POST"])
     @login_required
@@ -301,8 +423,15 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
     @login_required
     def course_detail(course_id):
         course = db.session.get(Course, course_id) or abort(404)
-        students = Student.query.filter_by(course_id=course_id).order_by(Student.last_name, Student.first_name).all()
-        return render_template("course_students.html", course=course, students=students)
+        page = request.args.get("page", 1, type=int)
+        pagination = (
+            Student.query
+            .options(load_only(*STUDENT_LIST_COLUMNS))
+            .filter_by(course_id=course_id)
+            .order_by(Student.last_name, Student.first_name)
+            .paginate(page=page, per_page=PAGE_SIZE, error_out=False)
+        )
+        return render_template("course_students.html", course=course, students=pagination.items, pagination=pagination)
 
     @app.route("/courses/<int:course_id>/upload", methods=["POST"])
     @login_required
@@ -312,31 +441,38 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
         if not file:
             flash("Please choose a CSV file.", "warning")
             return redirect(url_for("course_detail", course_id=course.id))
-        import csv, io
-        decoded = file.stream.read().decode("utf-8")
-        reader = csv.DictReader(io.StringIO(decoded))
+        try:
+            df = _read_upload_csv(file)
+        except pd.errors.ParserError:
+            flash("Could not parse the CSV file; no students were changed.", "danger")
+            return redirect(url_for("course_detail", course_id=course.id))
         required = {"first_name", "last_name", "email", "team"}
-        if not required.issubset(set(reader.fieldnames or [])):
+        if df is None or not required.issubset(df.columns):
             flash(f"CSV must include columns: {', '.join(required)}", "danger")
             return redirect(url_for("course_detail", course_id=course.id))
-        # Replace students for this course
-        Student.query.filter_by(course_id=course.id).delete()
-        db.session.commit()
-        added = 0
-        for row in reader:
-            email = row["email"].strip().lower()
-            if not email:
-                continue
-            s = Student(
-                first_name=row["first_name"].strip(),
-                last_name=row["last_name"].strip(),
-                email=email,
-                team=row["team"].strip(),
-                course_id=course.id,
-            )
-            db.session.add(s); added += 1
+        rows = _student_rows(df)
+        for row in rows:
+            row["course_id"] = course.id
+        emails = [row["email"] for row in rows]
+        # Replace students for this course: drop those missing from the CSV, then one
+        # bulk UPDATE for emails already on file (moving them into this course) and one
+        # bulk INSERT for the rest
+        db.session.execute(
+            delete(Student).where(Student.course_id == course.id, Student.email.not_in(emails)),
+            execution_options={"synchronize_session": False},
+        )
+        existing = dict(db.session.execute(select(Student.email, Student.id).where(Student.email.in_(emails))).all())
+        updates = [dict(row, id=existing[row["email"]]) for row in rows if row["email"] in existing]
+        inserts = [row for row in rows if row["email"] not in existing]
+        if updates:
+            db.session.execute(update(Student), updates)
+        if inserts:
+            db.session.execute(Student.__table__.insert(), inserts)
         db.session.commit()
-        flash(f"Upload complete for {course.display_name}. {added} students added.", "success")
+        flash(
+            f"Upload complete for {course.display_name}. {len(inserts)} students added, {len(updates)} updated.",
+            "success",
+        )
         return redirect(url_for("course_detail", course_id=course.id))
 
     @app.route("/rubrics", methods=["GET","POST"])
@@ -349,22 +485,25 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
             db.session.add(r)
             db.session.flush()
             if use_prebuilt:
-                for it in PREBUILT_RUBRIC_ITEMS:
-                    db.session.add(RubricItem(
-                        rubric_id=r.id,
-                        criterion=it["criterion"],
-                        description=it["description"],
-                        weight=float(it["weight"]),
-                        max_score=int(it["max_score"]),
-                    ))
+                db.session.execute(
+                    RubricItem.__table__.insert(),
+                    [dict(row, rubric_id=r.id) for row in PREBUILT_RUBRIC_INSERT_ROWS],
+                )
                 db.session.commit()
                 flash("Rubric created from prebuilt template.", "success")
                 return redirect(url_for("edit_rubric", rubric_id=r.id))
             db.session.commit()
             flash("Rubric created. Add items below.", "success")
             return redirect(url_for("edit_rubric", rubric_id=r.id))
-        rubrics = Rubric.query.all()
-        return render_template("rubrics.html", rubrics=rubrics)
+        page = request.args.get("page", 1, type=int)
+        # The list shows each rubric's item count; load the page's items in one extra SELECT
+        pagination = (
+            Rubric.query
+            .options(selectinload(Rubric.items))
+            .order_by(Rubric.id)
+            .paginate(page=page, per_page=PAGE_SIZE, error_out=False)
+        )
+        return render_template("rubrics.html", rubrics=pagination.items, pagination=pagination)
     
     
     @app.route("/rubrics/<int:rubric_id>", methods=["GET","POST"])
@@ -451,16 +590,18 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
             file = request.files.get("file")
             if not file:
                 flash("Choose a CSV first.", "warning"); return redirect(request.url)
-            import csv, io
-            decoded = file.stream.read().decode("utf-8")
-            reader = csv.DictReader(io.StringIO(decoded))
+            try:
+                df = _read_upload_csv(file)
+            except pd.errors.ParserError:
+                flash("Could not parse the CSV file; no rubric was created.", "danger")
+                return redirect(request.url)
             required = {"criterion", "description", "weight", "max_score"}
-            if not required.issubset(set(reader.fieldnames or [])):
+            if df is None or not required.issubset(df.columns):
                 flash(f"CSV must include columns: {', '.join(required)}", "danger")
                 return redirect(request.url)
             r = Rubric(name=rname, active=True)
             db.session.add(r); db.session.flush()
-            for row in reader:
+            for row in df.to_dict("records"):
                 desc = (row.get("description", "") or "").strip()
                 if not desc:
                     db.session.rollback()
@@ -508,7 +649,8 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
     @app.route("/rounds/start", methods=["GET","POST"])
     @login_required
     def start_round():
-        rubrics = Rubric.query.all()
+        # The picker shows each rubric's item count
+        rubrics = Rubric.query.options(selectinload(Rubric.items)).all()
         if request.method == "POST":
             name = request.form.get("name","").strip() or f"Round {datetime.now().strftime('%Y-%m-%d %H:%M')}"
             rubric_id = int(request.form.get("rubric_id"))
@@ -516,26 +658,39 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
             r = EvalRound(name=name, rubric_id=rubric_id, status="active")
             db.session.add(r); db.session.flush()
         
-            students = Student.query.all()
-            by_team = {}
-            for s in students:
-                by_team.setdefault(s.team, []).append(s)
-            pairs = 0
-            for team, members in by_team.items():
-                for evaluator in members:
-                    for evaluatee in members:
-                        if evaluator.id == evaluatee.id: 
-                            continue
-                        db.session.add(EvaluationToken(eval_round_id=r.id, evaluator_id=evaluator.id, evaluatee_id=evaluatee.id))
-                        pairs += 1
+            # Plain column rows are enough here; skip hydrating full Student objects.
+            # Sorted by team (indexed) so each team arrives as one contiguous run.
+            students = db.session.execute(
+                select(Student.id, Student.team, Student.first_name, Student.last_name, Student.email)
+                .order_by(Student.team, Student.id)
+            ).all()
+            full_names = {s.id: f"{s.first_name} {s.last_name}" for s in students}
+            by_team = {team: list(members) for team, members in groupby(students, key=attrgetter("team"))}
+            pair_ids = [
+                (evaluator.id, evaluatee.id)
+                for members in by_team.values()
+                for evaluator, evaluatee in permutations(members, 2)
+            ]
+            token_rows = [
+                {"eval_round_id": r.id, "evaluator_id": evaluator_id, "evaluatee_id": evaluatee_id, "token": token}
+                for (evaluator_id, evaluatee_id), token in zip(pair_ids, EvaluationToken.bulk_tokens(len(pair_ids)))
+            ]
+            if token_rows:
+                db.session.execute(EvaluationToken.__table__.insert(), token_rows)
+            pairs = len(token_rows)
             db.session.commit()
+            tokens_by_evaluator = {}
+            for row in token_rows:
+                tokens_by_evaluator.setdefault(row["evaluator_id"], []).append(row)
 
             base = request.url_root.rstrip("/")
-            emails = 0
+            # Build the link prefix once; each token is appended without another url_for call
+            eval_url_prefix = base + url_for("evaluate", token="")
+            outgoing = []
             for team, members in by_team.items():
                 for evaluator in members:
-                    tokens = EvaluationToken.query.filter_by(eval_round_id=r.id, evaluator_id=evaluator.id).all()
-                    links = [f"- Evaluate {t.evaluatee.full_name}: {base}" + url_for('evaluate', token=t.token) for t in tokens]
+                    tokens = tokens_by_evaluator.get(evaluator.id, [])
+                    links = [f"- Evaluate {full_names[t['evaluatee_id']]}: {eval_url_prefix}{t['token']}" for t in tokens]
                     body = f"""Hello {evaluator.first_name},
 
     You have peer evaluations to complete for round '{r.name}'. Please complete a form for each teammate:
@@ -546,10 +701,14 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
 
     Thank you.
     """
-                    send_email(evaluator.email, f"Peer Evaluations - {r.name}", body)
-                    for t in tokens:
-                        t.sent_at = datetime.utcnow()
-                    emails += 1
+                    outgoing.append((evaluator.email, f"Peer Evaluations - {r.name}", body))
+            send_emails_bulk(outgoing)
+            db.session.execute(
+                update(EvaluationToken)
+                .where(EvaluationToken.eval_round_id == r.id)
+                .values(sent_at=datetime.utcnow())
+            )
+            emails = len(outgoing)
             db.session.commit()
 
             flash(f"Round '{r.name}' started. Generated {pairs} evaluation links and sent {emails} emails (or outbox entries).", "success")
@@ -560,24 +719,38 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
     @app.route("/outbox")
     @login_required
     def outbox():
-        msgs = DevOutbox.query.order_by(DevOutbox.created_at.desc()).limit(200).all()
+        page = request.args.get("page", 1, type=int)
+        # id breaks created_at ties so LIMIT/OFFSET pages never overlap or skip rows
+        pagination = (
+            DevOutbox.query
+            .order_by(DevOutbox.created_at.desc(), DevOutbox.id.desc())
+            .paginate(page=page, per_page=PAGE_SIZE, error_out=False)
+        )
+        msgs = pagination.items
         target = current_app.config.get("EMAIL_LINK_TARGET", "outlook")
         # Extract evaluation links from message bodies to offer quick-open buttons
-        import re
-        pattern = re.compile(r"-\s*Evaluate\s+([^:]+):\s*(https?://\S+)")
-        msg_forms = {}
-        for m in msgs:
-            forms = []
-            for match in pattern.finditer(m.body or ""):
-                label = match.group(1).strip()
-                url = match.group(2).strip()
-                forms.append({"label": f"Evaluate {label}", "url": url})
-            msg_forms[m.id] = forms
-        return render_template("outbox.html", msgs=msgs, email_target=target, msg_forms=msg_forms)
+        msg_forms = {
+            m.id: [
+                {"label": f"Evaluate {mo.group(1).strip()}", "url": mo.group(2).strip()}
+                for mo in _OUTBOX_LINK_RE.finditer(m.body or "")
+            ]
+            for m in msgs
+        }
+        return render_template("outbox.html", msgs=msgs, pagination=pagination, email_target=target, msg_forms=msg_forms)
 
     @app.route("/evaluate/<token>", methods=["GET","POST"])
     def evaluate(token):
-        t = EvaluationToken.query.filter_by(token=token).first_or_404()
+        # Token, round, rubric and both students in one joined SELECT on the unique (indexed)
+        # token; the rubric items follow in one more
+        t = db.session.scalar(
+            select(EvaluationToken)
+            .options(
+                joinedload(EvaluationToken.eval_round).joinedload(EvalRound.rubric).selectinload(Rubric.items),
+                joinedload(EvaluationToken.evaluator),
+                joinedload(EvaluationToken.evaluatee),
+            )
+            .where(EvaluationToken.token == token)
+        ) or abort(404)
         round = t.eval_round
         if round.status != "active":
             return render_template("evaluation_form.html", closed=True, t=t, rubric=round.rubric)
@@ -585,77 +758,71 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
             if t.submitted_at is not None:
                 flash("This evaluation was already submitted.", "warning")
                 return redirect(request.url)
-            scores = {}
-            for item in round.rubric.items:
-                key = f"criterion_{item.id}"
-                try:
-                    val = int(request.form.get(key, "0"))
-                except ValueError:
-                    val = 0
-                val = max(0, min(item.max_score, val))
-                scores[str(item.id)] = val
-            resp = EvaluationResponse(token_id=t.id, scores=scores, comments=None)
+            scores = {
+                str(item.id): _form_score(request.form.get(f"criterion_{item.id}"), item.max_score)
+                for item in round.rubric.items
+            }
+            # One ON CONFLICT statement, so a concurrent double submit cannot trip the unique token_id
             t.submitted_at = datetime.utcnow()
-            db.session.add(resp); db.session.commit()
+            EvaluationResponse.upsert(t.id, scores, submitted_at=t.submitted_at)
+            db.session.commit()
             return render_template("evaluation_form.html", submitted=True, t=t, rubric=round.rubric)
         return render_template("evaluation_form.html", t=t, rubric=round.rubric)
 
     @app.route("/rounds/<int:round_id>/report")
     @login_required
     def report(round_id):
-        r = db.session.get(EvalRound, round_id) or abort(404)
-        tokens = EvaluationToken.query.filter_by(eval_round_id=round_id).all()
-        rows = []
-        for t in tokens:
-            evaluator = t.evaluator.full_name
-            evaluatee = t.evaluatee.full_name
-            team = t.evaluatee.team
-            if t.response:
-                submitted = t.response.submitted_at
-                scores = t.response.scores
-                comments = t.response.comments or ""
-            else:
-                submitted = None
-                scores = {}
-                comments = ""
-            rows.append({
-                "round": r.name,
-                "team": team,
-                "evaluator": evaluator,
-                "evaluatee": evaluatee,
-                "submitted_at": submitted.isoformat() if submitted else "",
-                "scores": scores,
-                "comments": comments
-            })
-        rubric_items = {str(it.id): (it.criterion, it.weight, it.max_score) for it in r.rubric.items}
-        raw_records = []
-        for row in rows:
-            base = {
-                "Round": row["round"],
-                "Team": row["team"],
-                "Evaluator": row["evaluator"],
-                "Evaluatee": row["evaluatee"],
-                "Submitted At": row["submitted_at"],
-                "Comments": row["comments"]
-            }
-            for cid, (crit, weight, max_score) in rubric_items.items():
-                base[f"{crit} (score/{max_score})"] = row["scores"].get(cid, "")
-            raw_records.append(base)
-        df_raw = pd.DataFrame(raw_records)
-
-        per_eval = []
-        for row in rows:
-            s = row["scores"]
-            if not s:
-                continue
-            score_pct = compute_weighted_percentage(s, rubric_items)
-            per_eval.append({
-                "Evaluatee": row["evaluatee"],
-                "Team": row["team"],
-                "Evaluator": row["evaluator"],
-                "Score %": round(score_pct, 2)
-            })
-        df_eval = pd.DataFrame(per_eval)
+        r = db.session.get(
+            EvalRound, round_id,
+            options=[selectinload(EvalRound.rubric).selectinload(Rubric.items)],
+        ) or abort(404)
+        tokens = (
+            EvaluationToken.query
+            .options(
+                joinedload(EvaluationToken.evaluator),
+                joinedload(EvaluationToken.evaluatee),
+                joinedload(EvaluationToken.response),
+            )
+            .filter_by(eval_round_id=round_id)
+            # Without an ORDER BY, row order follows whichever index the planner picks
+            .order_by(EvaluationToken.id)
+            .all()
+        )
+        criterion_ids, weights, max_scores = r.rubric.scoring_arrays
+        n, k = len(tokens), len(criterion_ids)
+
+        # Fill the report column by column in a single pass over the tokens;
+        # scores go straight into an (n, k) matrix, NaN where nothing was submitted
+        teams = [t.evaluatee.team for t in tokens]
+        evaluators = [t.evaluator.full_name for t in tokens]
+        evaluatees = [t.evaluatee.full_name for t in tokens]
+        submitted = [t.response.submitted_at.isoformat() if t.response and t.response.submitted_at else "" for t in tokens]
+        comments_col = [(t.response.comments or "") if t.response else "" for t in tokens]
+        has_scores = np.zeros(n, dtype=bool)
+        score_mat = np.full((n, k), np.nan)
+        for i, t in enumerate(tokens):
+            scores = t.response.scores if t.response else None
+            if scores:
+                has_scores[i] = True
+                score_mat[i] = np.fromiter((scores.get(cid, np.nan) for cid in criterion_ids), dtype=float, count=k)
+
+        raw_header = ["Round", "Team", "Evaluator", "Evaluatee", "Submitted At", "Comments"]
+        raw_header += [f"{it.criterion} (score/{it.max_score})" for it in r.rubric.items]
+        score_cells = np.where(np.isnan(score_mat), "", score_mat.astype(object)).tolist()
+        raw_rows = (
+            [r.name, team, evaluator, evaluatee, sub, comments] + cells
+            for team, evaluator, evaluatee, sub, comments, cells
+            in zip(teams, evaluators, evaluatees, submitted, comments_col, score_cells)
+        )
+
+        # Weighted percentage for every submitted evaluation in one matrix product
+        pcts = compute_weighted_percentages(score_mat[has_scores], weights, max_scores)
+        df_eval = pd.DataFrame({
+            "Evaluatee": np.array(evaluatees, dtype=object)[has_scores],
+            "Team": np.array(teams, dtype=object)[has_scores],
+            "Evaluator": np.array(evaluators, dtype=object)[has_scores],
+            "Score %": pcts.round(2),
+        })
         if not df_eval.empty:
             method = current_app.config.get("SCORING_METHOD", "mean")
             trim_f = float(current_app.config.get("SCORING_TRIM_FRACTION", 0.0) or 0.0)
@@ -673,34 +840,50 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
             curve_stats = {"mean": 0.0, "std": 0.0, "k": 0.0, "protect_threshold": 80.0}
 
         summaries = []
-        by_student_comments = {}
-        for row in rows:
-            if row["comments"]:
-                by_student_comments.setdefault((row["evaluatee"], row["team"]), []).append(row["comments"])
+        # Let the database gather each evaluatee's comments in one grouped query
+        comment_groups = db.session.execute(
+            select(
+                Student.id, Student.first_name, Student.last_name, Student.team,
+                _string_agg(EvaluationResponse.comments, COMMENT_SEP),
+            )
+            .select_from(EvaluationToken)
+            .join(EvaluationResponse, EvaluationResponse.token_id == EvaluationToken.id)
+            .join(Student, Student.id == EvaluationToken.evaluatee_id)
+            .where(EvaluationToken.eval_round_id == round_id, EvaluationResponse.comments != "")
+            .group_by(Student.id)
+            .order_by(Student.team, Student.last_name, Student.first_name)
+        ).all()
+        # Keyed by student id so teammates who share a name keep separate comments
+        by_student_comments = {
+            student_id: (f"{first} {last}", team, joined.split(COMMENT_SEP))
+            for student_id, first, last, team, joined in comment_groups
+        }
         api_key = current_app.config.get("OPENAI_API_KEY")
-        for (eval_name, team), comments in by_student_comments.items():
+        if api_key:
+            # One API round-trip for the whole round, keyed by student id
+            ai_summaries = openai_summarize_batch(
+                api_key, {str(student_id): comments for student_id, (_, _, comments) in by_student_comments.items()}
+            )
+        for student_id, (eval_name, team, comments) in by_student_comments.items():
             if api_key:
-                summary = openai_summarize(api_key, comments)
+                summary = ai_summaries[str(student_id)]
             else:
                 summary = simple_summarize(comments, max_sentences=3)
-            flags = sorted({f for c in comments for f in detect_red_flags(c)})
-            summaries.append({
-                "Evaluatee": eval_name,
-                "Team": team,
-                "Summary": summary,
-                "Red Flags": ", ".join(flags)
-            })
-        df_sum = pd.DataFrame(summaries) if summaries else pd.DataFrame(columns=["Evaluatee","Team","Summary","Red Flags"])
-
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="openpyxl") as writer:
-            df_raw.to_excel(writer, sheet_name="RawFeedback", index=False)
-            df_scores.to_excel(writer, sheet_name="Scores", index=False)
-            df_sum.to_excel(writer, sheet_name="Summaries", index=False)
-            # Curve stats
-            pd.DataFrame([
-                {"Mean": curve_stats.get("mean"), "Std": curve_stats.get("std"), "k": curve_stats.get("k"), "Protect_Threshold": curve_stats.get("protect_threshold")}
-            ]).to_excel(writer, sheet_name="Curve", index=False)
+            # Keywords contain no newlines, so one scan of the joined text finds the same flags
+            flags = detect_red_flags("\n".join(comments))
+            summaries.append([eval_name, team, summary, ", ".join(flags)])
+
+        # Stream rows straight into the workbook; constant_memory flushes each row once written
+        # send_file closes the spool once the response has been streamed
+        output = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE)
+        wb = xlsxwriter.Workbook(output, {"constant_memory": True})
+        _write_sheet(wb, "RawFeedback", raw_header, raw_rows)
+        _write_sheet(wb, "Scores", list(df_scores.columns), df_scores.itertuples(index=False, name=None))
+        _write_sheet(wb, "Summaries", ["Evaluatee", "Team", "Summary", "Red Flags"], summaries)
+        _write_sheet(wb, "Curve", ["Mean", "Std", "k", "Protect_Threshold"], [[
+            curve_stats.get("mean"), curve_stats.get("std"), curve_stats.get("k"), curve_stats.get("protect_threshold")
+        ]])
+        wb.close()
         output.seek(0)
         filename = f"peer-eval-report-round-{r.id}.xlsx"
         return send_file(output, as_attachment=True, download_name=filename, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
@@ -719,46 +902,29 @@ This link will expire in 60 minutes. If you did not request a reset, you can ign
     def delete_round(round_id):
         r = db.session.get(EvalRound, round_id) or abort(404)
 
-        tokens = EvaluationToken.query.filter_by(eval_round_id=round_id).all()
-        token_ids = [t.id for t in tokens]
-        token_strings = [t.token for t in tokens if getattr(t, "token", None)]
-
-        deleted_outbox = False
-        try:
-            outs = DevOutbox.query.filter_by(eval_round_id=round_id).all()
-            for o in outs:
-                db.session.delete(o)
-            deleted_outbox = True
-        except Exception:
-            pass
-
-        if not deleted_outbox:
-            try:
-                if token_ids:
-                    outs = DevOutbox.query.filter(DevOutbox.token_id.in_(token_ids)).all()
-                    for o in outs:
-                        db.session.delete(o)
-                    deleted_outbox = True
-            except Exception:
-                pass
-
-        if not deleted_outbox and token_strings:
-            try:
-                filters = [DevOutbox.body.contains(ts) for ts in token_strings]
-                if filters:
-                    outs = DevOutbox.query.filter(or_(*filters)).all()
-                    for o in outs:
-                        db.session.delete(o)
-            except Exception:
-                pass
-
-        for t in tokens:
-            if getattr(t, "response", None):
-                try:
-                    db.session.delete(t.response)
-                except Exception:
-                    pass
-            db.session.delete(t)
+        # Outbox rows carry no round or token id, so match messages by the tokens in their
+        # bodies; one correlated DELETE, run before the tokens themselves are removed
+        db.session.execute(
+            delete(DevOutbox).where(
+                select(EvaluationToken.id)
+                .where(EvaluationToken.eval_round_id == round_id, DevOutbox.body.contains(EvaluationToken.token))
+                .exists()
+            ),
+            execution_options={"synchronize_session": False},
+        )
+
+        # The FKs declare ON DELETE CASCADE, but SQLite only enforces that with foreign_keys
+        # enabled and on tables created after the clause was added, so remove dependents
+        # with two set-based DELETEs rather than one statement per object.
+        round_token_ids = select(EvaluationToken.id).where(EvaluationToken.eval_round_id == round_id)
+        db.session.execute(
+            delete(EvaluationResponse).where(EvaluationResponse.token_id.in_(round_token_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.execute(
+            delete(EvaluationToken).where(EvaluationToken.eval_round_id == round_id),
+            execution_options={"synchronize_session": False},
+        )
 
         db.session.delete(r)
         db.session.commit()
@@ -780,6 +946,27 @@ def init_db(app):
                     db.session.commit()
         except Exception:
             db.session.rollback()
+        # Lightweight migration: Postgres tables created before scores became jsonb
+        try:
+            if db.engine.dialect.name == "postgresql":
+                scores_type = db.session.execute(text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = 'evaluation_response' AND column_name = 'scores'"
+                )).scalar()
+                if scores_type == "json":
+                    db.session.execute(text(
+                        "ALTER TABLE evaluation_response ALTER COLUMN scores TYPE jsonb USING scores::jsonb"
+                    ))
+                    db.session.commit()
+        except Exception:
+            db.session.rollback()
+        # create_all skips existing tables, so add any model indexes they are missing
+        try:
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
+        except Exception:
+            db.session.rollback()
         # Ensure a default course exists and backfill students without a course
         default = Course.query.first()
         if not default:
@@ -18,6 +18,7 @@ class Config:
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "True").lower() == "true"
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "Peer Eval <no-reply@example.com>")
+    EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "16"))  # parallel SMTP connections for bulk sends
 
     # NLP Options
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -1,27 +1,153 @@
+import atexit
+from datetime import datetime
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
+from email.policy import compat32
 from flask import current_app
 from models import db, DevOutbox
 
+# Messages sent over one SMTP connection before it is closed and replaced
+MAX_EMAILS_PER_CONN = 100
+# Pooled connections idle longer than this are checked with NOOP before reuse
+SMTP_IDLE_CHECK_SECONDS = 30
+# Wire format for pre-flattened messages; sendmail sends bytes without fixing line endings
+_SMTP_POLICY = compat32.clone(linesep="\r\n")
+
 def _has_smtp_config():
     cfg = current_app.config
     return bool(cfg.get("MAIL_SERVER") and cfg.get("MAIL_USERNAME") and cfg.get("MAIL_PASSWORD"))
 
+def _build_message(sender: str, to_addr: str, subject: str, body: str) -> bytes:
+    """Build and flatten a plain-text message once, ready for SMTP.sendmail."""
+    msg = MIMEText(body, "plain", "utf-8")
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to_addr
+    return msg.as_bytes(policy=_SMTP_POLICY)
+
+def _close_quietly(server):
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+class SMTPPool:
+    """Logged-in SMTP connections reused across sends, requests and worker threads.
+
+    Each connection is used by one thread at a time; idle ones wait in a list guarded
+    by a lock. A connection is retired after MAX_EMAILS_PER_CONN messages, and one that
+    has sat idle is health-checked with NOOP before reuse.
+    """
+
+    def __init__(self, cfg):
+        self.host = cfg["MAIL_SERVER"]
+        self.port = cfg["MAIL_PORT"]
+        self.username = cfg["MAIL_USERNAME"]
+        self.password = cfg["MAIL_PASSWORD"]
+        self.use_tls = cfg.get("MAIL_USE_TLS", True)
+        self._idle = []  # (server, messages sent, last used)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, sent, last_used = self._idle.pop()
+            if time.monotonic() - last_used < SMTP_IDLE_CHECK_SECONDS:
+                return server, sent
+            try:
+                if server.noop()[0] == 250:
+                    return server, sent
+            except smtplib.SMTPException:
+                pass
+            server.close()
+        return self._connect(), 0
+
+    def _checkin(self, server, sent):
+        if sent >= MAX_EMAILS_PER_CONN:
+            _close_quietly(server)
+            return
+        with self._lock:
+            self._idle.append((server, sent, time.monotonic()))
+
+    def send(self, sender, to_addr, payload):
+        server, sent = self._checkout()
+        try:
+            server.sendmail(sender, [to_addr], payload)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped a pooled connection; retry once on a fresh one
+            server.close()
+            server, sent = self._connect(), 0
+            try:
+                server.sendmail(sender, [to_addr], payload)
+            except Exception:
+                server.close()
+                raise
+        except Exception:
+            _close_quietly(server)
+            raise
+        self._checkin(server, sent + 1)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _sent, _last_used in idle:
+            _close_quietly(server)
+
+def _smtp_pool():
+    """The app's SMTPPool, created on first use and closed at interpreter exit."""
+    pool = current_app.extensions.get("smtp_pool")
+    if pool is None:
+        pool = current_app.extensions.setdefault("smtp_pool", SMTPPool(current_app.config))
+        atexit.register(pool.close_all)
+    return pool
+
 def send_email(to_addr: str, subject: str, body: str):
-    cfg = current_app.config
+    send_emails_bulk([(to_addr, subject, body)])
+
+def send_emails_bulk(messages):
+    """Send (to_addr, subject, body) tuples over EMAIL_WORKERS pooled SMTP connections (or one outbox commit in dev)."""
+    if not messages:
+        return
     if _has_smtp_config():
-        msg = MIMEText(body, "plain", "utf-8")
-        msg["Subject"] = subject
-        msg["From"] = cfg.get("MAIL_DEFAULT_SENDER")
-        msg["To"] = to_addr
-        with smtplib.SMTP(cfg["MAIL_SERVER"], cfg["MAIL_PORT"]) as server:
-            if cfg.get("MAIL_USE_TLS", True):
-                server.starttls()
-            server.login(cfg["MAIL_USERNAME"], cfg["MAIL_PASSWORD"])
-            server.send_message(msg)
+        # Worker threads have no app context, so resolve the pool and sender up front
+        pool = _smtp_pool()
+        sender = current_app.config.get("MAIL_DEFAULT_SENDER")
+        workers = max(1, min(current_app.config.get("EMAIL_WORKERS", 16), len(messages)))
+
+        def send_batch(batch):
+            for to_addr, subject, body in batch:
+                pool.send(sender, to_addr, _build_message(sender, to_addr, subject, body))
+
+        batches = [messages[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            # list() drains the iterator so a failed send re-raises here
+            list(ex.map(send_batch, batches))
     else:
-        # Dev mode: store in outbox
-        out = DevOutbox(to_addr=to_addr, subject=subject, body=body)
-        db.session.add(out)
+        # Dev mode: store in outbox with one Core executemany; nothing here needs the new
+        # rows back, so skip the ORM. Each row keeps its own timestamp, as before
+        db.session.execute(
+            DevOutbox.__table__.insert(),
+            [
+                {"created_at": datetime.utcnow(), "to_addr": to_addr, "subject": subject, "body": body}
+                for to_addr, subject, body in messages
+            ],
+        )
         db.session.commit()
-        print(f"[DevOutbox] To: {to_addr}\nSubject: {subject}\n{body}\n")
+        for to_addr, subject, body in messages:
+            print(f"[DevOutbox] To: {to_addr}\nSubject: {subject}\n{body}\n")
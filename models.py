@@ -1,32 +1,79 @@
+import base64
 from datetime import datetime
-import uuid
+from functools import cached_property
+import os
+import secrets
+from typing import List
+import numpy as np
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from sqlalchemy import UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import JSON as SAJSON
 from sqlalchemy.orm import validates
 
 db = SQLAlchemy()
 
+# argon2id via argon2-cffi, with its cost tuned here instead of inherited from werkzeug defaults:
+# 32 MiB x 2 passes keeps a login verify in the tens of milliseconds on one core
+password_hasher = PasswordHasher(time_cost=2, memory_cost=32768, parallelism=1)
+
+# Random bytes per evaluation token; a multiple of 3 so base64 needs no padding (24 chars)
+TOKEN_BYTES = 18
+
+def new_token() -> str:
+    """24-char URL-safe evaluation token (144 random bits)."""
+    return secrets.token_urlsafe(TOKEN_BYTES)
+
+def dialect_insert(model):
+    """Return an INSERT for the bound database dialect, which supports ON CONFLICT upserts."""
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        """Verify password; on success, upgrade a legacy or outdated hash in place (caller commits)."""
+        if self.password_hash.startswith("$argon2"):
+            try:
+                password_hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            if password_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+            return True
+        # Accounts created before the argon2 switch still hold werkzeug hashes
+        if not check_password_hash(self.password_hash, password):
+            return False
+        self.set_password(password)
+        return True
 
 class Student(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(120), nullable=False)
     last_name = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(255), unique=True, nullable=False)
-    team = db.Column(db.String(120), nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey("course.id"), nullable=True)
+    team = db.Column(db.String(120), nullable=False, index=True)
+    course_id = db.Column(db.Integer, db.ForeignKey("course.id"), nullable=True, index=True)
+
+    evaluations_given = db.relationship(
+        "EvaluationToken", foreign_keys="EvaluationToken.evaluator_id", back_populates="evaluator", passive_deletes=True
+    )
+    evaluations_received = db.relationship(
+        "EvaluationToken", foreign_keys="EvaluationToken.evaluatee_id", back_populates="evaluatee", passive_deletes=True
+    )
 
     @property
     def full_name(self):
@@ -38,6 +85,14 @@ class Rubric(db.Model):
     active = db.Column(db.Boolean, default=True)
     items = db.relationship("RubricItem", backref="rubric", cascade="all, delete-orphan")
 
+    @cached_property
+    def scoring_arrays(self):
+        """(criterion ids as str, weights, max scores) in item order, built once per instance."""
+        ids = [str(it.id) for it in self.items]
+        weights = np.fromiter((it.weight for it in self.items), dtype=np.float64, count=len(ids))
+        max_scores = np.fromiter((it.max_score for it in self.items), dtype=np.float64, count=len(ids))
+        return ids, weights, max_scores
+
 class Course(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
@@ -52,7 +107,7 @@ class Course(db.Model):
 
 class RubricItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    rubric_id = db.Column(db.Integer, db.ForeignKey("rubric.id"), nullable=False)
+    rubric_id = db.Column(db.Integer, db.ForeignKey("rubric.id"), nullable=False, index=True)
     criterion = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     weight = db.Column(db.Float, nullable=False, default=1.0)
@@ -65,36 +120,67 @@ class EvalRound(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(50), default="draft") 
     rubric = db.relationship("Rubric")
+    tokens = db.relationship("EvaluationToken", back_populates="eval_round", passive_deletes=True)
 
 class EvaluationToken(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    token = db.Column(db.String(64), unique=True, nullable=False, default=lambda: uuid.uuid4().hex)
-    eval_round_id = db.Column(db.Integer, db.ForeignKey("eval_round.id"), nullable=False)
+    token = db.Column(db.String(64), unique=True, nullable=False, default=new_token)
+    eval_round_id = db.Column(db.Integer, db.ForeignKey("eval_round.id", ondelete="CASCADE"), nullable=False)
     evaluator_id = db.Column(db.Integer, db.ForeignKey("student.id"), nullable=False)
     evaluatee_id = db.Column(db.Integer, db.ForeignKey("student.id"), nullable=False)
     sent_at = db.Column(db.DateTime, nullable=True)
     submitted_at = db.Column(db.DateTime, nullable=True)
 
-    eval_round = db.relationship("EvalRound", backref="tokens")
-    evaluator = db.relationship("Student", foreign_keys=[evaluator_id])
-    evaluatee = db.relationship("Student", foreign_keys=[evaluatee_id])
+    # A round's tokens share one parent, which the default lazy load finds in the identity map
+    eval_round = db.relationship("EvalRound", back_populates="tokens")
+    # Nearly every use of a token reads both students, so load them for a whole result set
+    # in one extra SELECT each; queries can still override with joinedload
+    evaluator = db.relationship("Student", foreign_keys=[evaluator_id], back_populates="evaluations_given", lazy="selectin")
+    evaluatee = db.relationship("Student", foreign_keys=[evaluatee_id], back_populates="evaluations_received", lazy="selectin")
+    response = db.relationship("EvaluationResponse", back_populates="token", uselist=False, passive_deletes=True)
+
+    @classmethod
+    def bulk_tokens(cls, n: int) -> List[str]:
+        """n new_token()-style tokens from one urandom read and one base64 encode, sliced apart."""
+        width = TOKEN_BYTES * 4 // 3
+        encoded = base64.urlsafe_b64encode(os.urandom(TOKEN_BYTES * n)).decode("ascii")
+        return [encoded[i:i + width] for i in range(0, width * n, width)]
 
     __table_args__ = (
         UniqueConstraint("eval_round_id", "evaluator_id", "evaluatee_id", name="uq_round_evalpair"),
+        # The unique index above serves (round) and (round, evaluator) lookups;
+        # this one serves per-evaluatee scoring within a round
+        db.Index("ix_tok_round_evaluatee", "eval_round_id", "evaluatee_id"),
     )
 
 class EvaluationResponse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    token_id = db.Column(db.Integer, db.ForeignKey("evaluation_token.id"), nullable=False, unique=True)
+    token_id = db.Column(db.Integer, db.ForeignKey("evaluation_token.id", ondelete="CASCADE"), nullable=False, unique=True)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
-    scores = db.Column(SAJSON, nullable=False) 
+    # Postgres stores the criterion -> int score map as binary jsonb (no reparse per read)
+    scores = db.Column(SAJSON().with_variant(JSONB(), "postgresql"), nullable=False)
     comments = db.Column(db.Text, nullable=True)
 
-    token = db.relationship("EvaluationToken", backref=db.backref("response", uselist=False))                                    ###
+    token = db.relationship("EvaluationToken", back_populates="response")
+
+    @classmethod
+    def upsert(cls, token_id: int, scores, comments=None, submitted_at=None):
+        """Insert or replace the response for token_id in one statement, keyed on its unique constraint."""
+        stmt = dialect_insert(cls).values(
+            token_id=token_id, scores=scores, comments=comments, submitted_at=submitted_at or datetime.utcnow()
+        )
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=["token_id"],
+            set_={
+                "scores": stmt.excluded.scores,
+                "comments": stmt.excluded.comments,
+                "submitted_at": stmt.excluded.submitted_at,
+            },
+        ))
 
 class DevOutbox(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     to_addr = db.Column(db.String(255), nullable=False)
     subject = db.Column(db.String(255), nullable=False)
     body = db.Column(db.Text, nullable=False)
\ No newline at end of file
@@ -1,7 +1,12 @@
-from collections import Counter
+import asyncio
+from functools import lru_cache
+import json
 import re
 from typing import List, Dict
 
+import numpy as np
+import pandas as pd
+
 # Simple keyword-based red-flag detector
 RED_FLAG_KEYWORDS = [
     "harass", "threat", "unsafe", "violence", "abuse", "bully",
@@ -9,41 +14,139 @@ RED_FLAG_KEYWORDS = [
     "self-harm", "assault", "racist", "sexist", "hate", "stalker",
 ]
 
+# Summarizer tokenization: sentence breaks after terminal punctuation, and words
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"[a-zA-Z']+")
+
+# All keywords in one pattern; the lookahead reports overlapping hits, like a substring test per keyword
+RED_FLAG_RE = re.compile("(?=(" + "|".join(map(re.escape, RED_FLAG_KEYWORDS)) + "))")
+_MIN_RED_FLAG_LEN = min(map(len, RED_FLAG_KEYWORDS))
+
+# Optional: pyahocorasick walks the text once through a keyword automaton
+try:
+    import ahocorasick  # type: ignore
+    _RED_FLAG_AUTOMATON = ahocorasick.Automaton()
+    for _kw in RED_FLAG_KEYWORDS:
+        _RED_FLAG_AUTOMATON.add_word(_kw, _kw)
+    _RED_FLAG_AUTOMATON.make_automaton()
+except ImportError:
+    _RED_FLAG_AUTOMATON = None
+
 def detect_red_flags(text: str) -> List[str]:
-    if not text:
+    if not text or len(text) < _MIN_RED_FLAG_LEN:
         return []
     t = text.lower()
-    found = sorted({k for k in RED_FLAG_KEYWORDS if k in t})
-    return found
+    if _RED_FLAG_AUTOMATON is not None:
+        found = {kw for _end, kw in _RED_FLAG_AUTOMATON.iter(t)}
+    else:
+        found = set(RED_FLAG_RE.findall(t))
+    return sorted(found)
 
 def simple_summarize(texts: List[str], max_sentences: int = 3) -> str:
     # Frequency-based extractive summarizer (very basic)
     full_text = " ".join(texts)
-    sentences = re.split(r"(?<=[.!?])\s+", full_text)
+    sentences = _SENT_RE.split(full_text)
     if len(sentences) <= max_sentences:
         return full_text.strip()
-    words = re.findall(r"[a-zA-Z']+", full_text.lower())
-    freq = Counter(words)
-    scored = [(sum(freq.get(w,0) for w in re.findall(r"[a-zA-Z']+", s.lower())), s) for s in sentences]
-    top = [s for _, s in sorted(scored, reverse=True)[:max_sentences]]
+    # Lowercase and tokenize once; lower() leaves the sentence separators in place, so
+    # each token is credited to its sentence by searching the sentence start offsets
+    lowered = full_text.lower()
+    starts = np.array([0] + [m.end() for m in _SENT_RE.finditer(lowered)], dtype=np.int64)
+    matches = list(_WORD_RE.finditer(lowered))
+    # Word frequencies from one hash pass (factorize) and one C-level count
+    codes, _words = pd.factorize(np.array([m.group() for m in matches], dtype=object))
+    token_freq = np.bincount(codes)[codes]
+    positions = np.fromiter((m.start() for m in matches), dtype=np.int64, count=len(matches))
+    sentence_of = np.searchsorted(starts, positions, side="right") - 1
+    sentence_scores = np.bincount(sentence_of, weights=token_freq, minlength=len(sentences))
+    top = [s for _, s in sorted(zip(sentence_scores.tolist(), sentences), reverse=True)[:max_sentences]]
     return " ".join(top).strip()
 
-# Optional: OpenAI-powered improvements (used only if OPENAI_API_KEY provided)
+# Optional: OpenAI-powered improvements (used only if OPENAI_API_KEY provided; needs openai>=1.0)
+OPENAI_MODEL = "gpt-3.5-turbo"
+# Rough per-request payload budget; larger rounds are split into concurrent requests
+OPENAI_BATCH_MAX_CHARS = 12000
+# Completion tokens allowed per summary; also caps how many people share one request
+OPENAI_TOKENS_PER_SUMMARY = 200
+OPENAI_MAX_COMPLETION_TOKENS = 4000
+OPENAI_BATCH_CONCURRENCY = 4
+
+_BATCH_SYSTEM_PROMPT = (
+    "You receive a JSON object mapping an id to one person's peer feedback. "
+    "Reply with only a JSON object mapping each id to a succinct 3 bullet point summary."
+)
+
+@lru_cache(maxsize=4)
+def _openai_client(api_key: str):
+    # One client per key for the process, so its HTTP connection pool is reused across reports
+    from openai import OpenAI  # type: ignore
+    return OpenAI(api_key=api_key)
+
 def openai_summarize(api_key: str, texts: List[str]) -> str:
     try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        joined = "\n".join(texts)
-        # Using Chat Completions for compatibility
-        resp = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
+        resp = _openai_client(api_key).chat.completions.create(
+            model=OPENAI_MODEL,
             messages=[
                 {"role":"system","content":"Summarize peer feedback succinctly in 3 bullet points."},
-                {"role":"user","content": joined}
+                {"role":"user","content": "\n".join(texts)}
             ],
             temperature=0.2,
-            max_tokens=200
+            max_tokens=OPENAI_TOKENS_PER_SUMMARY
         )
-        return resp.choices[0].message["content"].strip()
-    except Exception as e:
+        return resp.choices[0].message.content.strip()
+    except Exception:
         return simple_summarize(texts)
+
+async def _openai_summarize_chunks(api_key: str, chunks: List[Dict[str, str]]) -> Dict[str, str]:
+    """Send every chunk of {key: joined feedback} concurrently; failed chunks contribute nothing."""
+    from openai import AsyncOpenAI  # type: ignore
+    limit = asyncio.Semaphore(OPENAI_BATCH_CONCURRENCY)
+
+    async def summarize(client, chunk: Dict[str, str]) -> Dict[str, str]:
+        async with limit:
+            resp = await client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role":"system","content": _BATCH_SYSTEM_PROMPT},
+                    {"role":"user","content": json.dumps(chunk)}
+                ],
+                temperature=0.2,
+                max_tokens=min(OPENAI_TOKENS_PER_SUMMARY * len(chunk), OPENAI_MAX_COMPLETION_TOKENS),
+                response_format={"type": "json_object"},
+            )
+        parsed = json.loads(resp.choices[0].message.content)
+        return {str(k): str(v).strip() for k, v in parsed.items()} if isinstance(parsed, dict) else {}
+
+    # The async client's connection pool is tied to this event loop, so it lives for one call
+    async with AsyncOpenAI(api_key=api_key) as client:
+        results = await asyncio.gather(*(summarize(client, chunk) for chunk in chunks), return_exceptions=True)
+    summaries: Dict[str, str] = {}
+    for result in results:
+        if isinstance(result, dict):
+            summaries.update(result)
+    return summaries
+
+def openai_summarize_batch(api_key: str, texts_by_key: Dict[str, List[str]]) -> Dict[str, str]:
+    """Summarize several people's feedback with as few chat completions as possible.
+
+    Feedback is packed into JSON-mode requests bounded by OPENAI_BATCH_MAX_CHARS and the
+    completion-token cap, sent concurrently. Any key a reply omits (or a failed/unparsable
+    call) falls back to simple_summarize.
+    """
+    if not texts_by_key:
+        return {}
+    max_keys = max(1, OPENAI_MAX_COMPLETION_TOKENS // OPENAI_TOKENS_PER_SUMMARY)
+    chunks: List[Dict[str, str]] = [{}]
+    size = 0
+    for key, texts in texts_by_key.items():
+        joined = "\n".join(texts)
+        if chunks[-1] and (size + len(joined) > OPENAI_BATCH_MAX_CHARS or len(chunks[-1]) >= max_keys):
+            chunks.append({})
+            size = 0
+        chunks[-1][key] = joined
+        size += len(joined)
+    try:
+        summaries = asyncio.run(_openai_summarize_chunks(api_key, chunks))
+    except Exception:
+        summaries = {}
+    return {key: summaries.get(key) or simple_summarize(texts) for key, texts in texts_by_key.items()}
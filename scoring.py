@@ -1,5 +1,6 @@
 from typing import Dict, Tuple
 
+import numpy as np
 import pandas as pd
 
 
@@ -15,16 +16,37 @@ def compute_weighted_percentage(
 
     Returns a percentage in [0, 100].
     """
-    total_weight = 0.0
-    weighted_sum = 0.0
-    for cid, (_crit, weight, max_score) in rubric_items_by_id.items():
-        total_weight += float(weight)
-        val = int(scores_by_criterion_id.get(cid, 0))
-        if max_score and max_score > 0:
-            weighted_sum += (val / max_score) * float(weight)
+    n = len(rubric_items_by_id)
+    items = rubric_items_by_id.values()
+    weights = np.fromiter((float(weight) for _crit, weight, _max in items), dtype=np.float64, count=n)
+    max_scores = np.fromiter((float(max_score or 0) for _crit, _weight, max_score in items), dtype=np.float64, count=n)
+    vals = np.fromiter(
+        (int(scores_by_criterion_id.get(cid, 0)) for cid in rubric_items_by_id), dtype=np.float64, count=n
+    )
+    return float(compute_weighted_percentages(vals[np.newaxis, :], weights, max_scores)[0])
+
+
+def compute_weighted_percentages(
+    score_matrix: np.ndarray,
+    weights: np.ndarray,
+    max_scores: np.ndarray,
+) -> np.ndarray:
+    """Vectorized compute_weighted_percentage over many submissions at once.
+
+    score_matrix: (n_submissions, n_criteria) array of scores; NaN counts as 0
+    weights, max_scores: per-criterion arrays of length n_criteria
+
+    Returns an array of n_submissions percentages in [0, 100].
+    """
+    scores = np.nan_to_num(np.asarray(score_matrix, dtype=float))
+    weights = np.asarray(weights, dtype=float)
+    max_scores = np.asarray(max_scores, dtype=float)
+    total_weight = weights.sum()
     if total_weight <= 0:
-        return 0.0
-    return (weighted_sum / total_weight) * 100.0
+        return np.zeros(len(scores))
+    # Criteria with no positive max score contribute weight but no points, as in the scalar version
+    ratios = np.divide(scores, max_scores, out=np.zeros_like(scores), where=max_scores > 0)
+    return ratios @ weights / total_weight * 100.0
 
 
 def aggregate_scores_df(
@@ -43,36 +65,29 @@ def aggregate_scores_df(
         return pd.DataFrame(columns=["Evaluatee", "Team", "Avg_Score_Pct", "N_Evals"])\
                  .astype({"Avg_Score_Pct": "float64", "N_Evals": "int64"})
 
-    if method == "median":
-        grouped = df_eval.groupby(["Evaluatee", "Team"]).agg(
-            Avg_Score_Pct=("Score %", "median"),
-            N_Evals=("Score %", "count"),
-        )
-    elif method == "trimmed_mean":
-        # Trim equally from both tails before averaging
-        def trimmed_mean(s: pd.Series) -> float:
-            n = len(s)
-            if n == 0:
-                return 0.0
-            f = float(trim_fraction or 0.0)
-            if f <= 0:
-                return float(s.mean())
-            k = int(n * f)
-            if k <= 0:
-                return float(s.mean())
-            s_sorted = s.sort_values().reset_index(drop=True)
-            if 2 * k >= n:
-                return float(s.mean())
-            return float(s_sorted.iloc[k:n - k].mean())
-
-        grouped = df_eval.groupby(["Evaluatee", "Team"]).agg(
-            Avg_Score_Pct=("Score %", trimmed_mean),
-            N_Evals=("Score %", "count"),
-        )
-    else:  # default mean
-        grouped = df_eval.groupby(["Evaluatee", "Team"]).agg(
-            Avg_Score_Pct=("Score %", "mean"),
-            N_Evals=("Score %", "count"),
+    # Hash-group once per pass without sorting groups (sort=False, observed=True); the
+    # result is sorted by (Team, Evaluatee) a single time at the end
+    keys = ["Evaluatee", "Team"]
+    if method == "trimmed_mean":
+        # Trim equally from both tails before averaging: order by score, rank each score
+        # within its group, and keep ranks [k, n - k); groups too small to trim keep every score.
+        # Only the key and score columns are reordered, and the kept rows are never reindexed
+        ordered = df_eval[keys + ["Score %"]].sort_values("Score %", kind="stable")
+        by_student = ordered.groupby(keys, sort=False, observed=True)["Score %"]
+        rank = by_student.cumcount()
+        n = by_student.transform("size")
+        k = (n * max(float(trim_fraction or 0.0), 0.0)).astype(int)
+        k = k.where(2 * k < n, 0)
+        kept = ordered[(rank >= k) & (rank < n - k)]
+        grouped = pd.DataFrame({
+            "Avg_Score_Pct": kept.groupby(keys, sort=False, observed=True)["Score %"].mean(),
+            "N_Evals": by_student.count(),
+        })
+    else:
+        stat = "median" if method == "median" else "mean"  # default mean
+        grouped = df_eval.groupby(keys, sort=False, observed=True)["Score %"].agg(
+            Avg_Score_Pct=stat,
+            N_Evals="count",
         )
 
     result = grouped.reset_index().sort_values(["Team", "Evaluatee"]).copy()
@@ -80,18 +95,23 @@ def aggregate_scores_df(
     return result
 
 
+# Lower bound of each grade above E, and the letters for the bins they split
+_BOUNDS = np.array([60.0, 70.0, 80.0, 90.0], dtype=np.float64)
+_LETTERS = np.array(["E", "D", "C", "B", "A"])
+
+
+def compute_letter_grades(percents) -> np.ndarray:
+    """Vectorized compute_letter_grade; side="right" puts each bound in the higher grade."""
+    p = np.asarray(percents, dtype=np.float64)
+    # searchsorted sorts NaN after every bound, which would read as an A; NaN fails every
+    # >= comparison of the scalar ladder, so it gets the lowest grade (infinities sort correctly)
+    idx = np.where(~np.isnan(p), np.searchsorted(_BOUNDS, p, side="right"), 0)
+    return _LETTERS[idx]
+
+
 def compute_letter_grade(percent: float) -> str:
     """Map percentage to letter grade using fixed bounds."""
-    p = float(percent)
-    if p >= 90.0:
-        return "A"
-    if p >= 80.0:
-        return "B"
-    if p >= 70.0:
-        return "C"
-    if p >= 60.0:
-        return "D"
-    return "E"
+    return str(compute_letter_grades(float(percent)))
 
 
 def apply_curve_scores(
@@ -118,13 +138,9 @@ def apply_curve_scores(
     mean_val = float(raw.mean()) if len(raw) else 0.0
     std_val = float(raw.std(ddof=0)) if len(raw) else 0.0
 
-    def adjust(x: float) -> float:
-        if x >= protect_threshold:
-            return float(x)
-        return float(x + k * (mean_val - x))
-
-    curved = raw.apply(adjust).round(2)
-    letters = curved.apply(compute_letter_grade)
+    raw_arr = raw.to_numpy(dtype=np.float64)
+    curved = np.where(raw_arr >= protect_threshold, raw_arr, raw_arr + k * (mean_val - raw_arr)).round(2)
+    letters = compute_letter_grades(curved)
     out = df_scores.copy()
     out["Curved_Score_Pct"] = curved
     out["Letter_Grade"] = letters
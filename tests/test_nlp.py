@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import nlp  # noqa: E402
+
+# Expected hits come from the original `keyword in text` scan: keywords match as
+# case-insensitive substrings, at word boundaries or inside longer words
+RED_FLAG_CASES = {
+    "The Bully was rude.": ["bully"],
+    "bully": ["bully"],
+    "whatever, he's a cheater": ["cheat", "hate"],
+    "Self-harm mentioned; THREATENING": ["self-harm", "threat"],
+    "Harassment\nand plagiarism": ["harass", "plagiar"],
+    "hateharass": ["harass", "hate"],
+    "hat e, dis crim": [],
+    "no issues here": [],
+    "": [],
+}
+
+
+class RedFlagTest(unittest.TestCase):
+    def assert_cases(self):
+        for text, expected in RED_FLAG_CASES.items():
+            with self.subTest(text=text):
+                self.assertEqual(nlp.detect_red_flags(text), expected)
+
+    def test_default_matcher(self):
+        # The Aho-Corasick automaton when pyahocorasick is installed
+        self.assert_cases()
+
+    def test_regex_matcher(self):
+        with mock.patch.object(nlp, "_RED_FLAG_AUTOMATON", None):
+            self.assert_cases()
+
+
+class SimpleSummarizeTest(unittest.TestCase):
+    # Expected summaries come from the original Counter-and-rescan summarizer
+    def test_short_feedback_is_returned_whole(self):
+        self.assertEqual(nlp.simple_summarize(["Great teammate. Always on time."]), "Great teammate. Always on time.")
+        self.assertEqual(nlp.simple_summarize(["  Spaced out.  "]), "Spaced out.")
+        self.assertEqual(nlp.simple_summarize([]), "")
+
+    def test_picks_sentences_with_the_most_frequent_words(self):
+        self.assertEqual(
+            nlp.simple_summarize(["Did solid work. Helped debug. Wrote docs. Reviewed code."]),
+            "Did solid work. Wrote docs. Reviewed code.",
+        )
+        self.assertEqual(
+            nlp.simple_summarize(["Work was good. Good work overall! Late once? Good good work.", "Nothing else."], 2),
+            "Good good work. Work was good.",
+        )
+        self.assertEqual(nlp.simple_summarize(["A b. A b. c d. e f."], 1), "A b.")
+
+    def test_ties_break_on_the_sentence_text(self):
+        self.assertEqual(nlp.simple_summarize(["One. Two. Three. Four."], 2), "Two. Three.")
+        # Sentences without word tokens all score zero
+        self.assertEqual(nlp.simple_summarize(["1. 2. 3. 4."]), "4. 3. 2.")
+
+
+if __name__ == "__main__":
+    unittest.main()
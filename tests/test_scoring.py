@@ -0,0 +1,120 @@
+import math
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scoring  # noqa: E402
+
+
+class LetterGradeTest(unittest.TestCase):
+    def test_bounds_belong_to_the_higher_grade(self):
+        cases = {
+            0.0: "E", 59.999: "E", 60.0: "D", 69.999: "D", 70.0: "C",
+            79.999: "C", 80.0: "B", 89.999: "B", 90.0: "A", 100.0: "A",
+        }
+        for percent, letter in cases.items():
+            with self.subTest(percent=percent):
+                self.assertEqual(scoring.compute_letter_grade(percent), letter)
+
+    def test_nan_is_e_and_infinities_follow_the_bounds(self):
+        self.assertEqual(scoring.compute_letter_grade(float("nan")), "E")
+        self.assertEqual(scoring.compute_letter_grade(math.inf), "A")
+        self.assertEqual(scoring.compute_letter_grade(-math.inf), "E")
+
+    def test_vectorized_grades_match_scalar(self):
+        percents = np.array([np.nan, -math.inf, 59.999, 60.0, 75.0, 80.0, 90.0, math.inf])
+        self.assertEqual(
+            scoring.compute_letter_grades(percents).tolist(),
+            [scoring.compute_letter_grade(p) for p in percents],
+        )
+
+
+# criterion id -> (name, weight, max_score); "3" has no max score, so it earns no points
+RUBRIC_ITEMS = {"1": ("Work", 2.0, 5), "2": ("Talk", 1.0, 3), "3": ("Extra", 1.0, 0)}
+
+
+class WeightedPercentageTest(unittest.TestCase):
+    # Expected values come from the original per-criterion loop
+    def test_missing_criteria_score_zero(self):
+        cases = [
+            ({"1": 5, "2": 3, "3": 2}, 75.0),
+            ({"1": 4}, 40.0),
+            ({"2": 3}, 25.0),
+            ({}, 0.0),
+        ]
+        for scores, expected in cases:
+            with self.subTest(scores=scores):
+                self.assertAlmostEqual(scoring.compute_weighted_percentage(scores, RUBRIC_ITEMS), expected)
+
+    def test_matrix_treats_nan_as_zero(self):
+        weights = np.array([2.0, 1.0, 1.0])
+        max_scores = np.array([5.0, 3.0, 0.0])
+        matrix = np.array([[5, 3, 2], [4, np.nan, np.nan], [np.nan, np.nan, np.nan]])
+        np.testing.assert_allclose(
+            scoring.compute_weighted_percentages(matrix, weights, max_scores), [75.0, 40.0, 0.0]
+        )
+
+    def test_zero_total_weight_is_zero(self):
+        self.assertEqual(scoring.compute_weighted_percentage({"1": 1}, {"1": ("Work", 0.0, 5)}), 0.0)
+
+
+# Ann and Bob have too few evaluations to trim; Cy (5) and Dee (6) lose k from each tail
+EVALS = pd.DataFrame({
+    "Evaluatee": ["Ann"] * 2 + ["Bob"] + ["Cy"] * 5 + ["Dee"] * 6,
+    "Team": ["T2"] * 2 + ["T1"] + ["T1"] * 5 + ["T2"] * 6,
+    "Evaluator": "x",
+    "Score %": [80.0, 40.0, 70.0, 10.0, 90.0, 50.0, 60.0, 100.0, 0.0, 20.0, 100.0, 30.0, 40.0, 35.0],
+})
+
+
+def _aggregate(method, trim_fraction=0.0):
+    result = scoring.aggregate_scores_df(EVALS, method, trim_fraction)
+    return result[["Evaluatee", "Team", "Avg_Score_Pct", "N_Evals"]].values.tolist()
+
+
+class TrimmedMeanTest(unittest.TestCase):
+    # Expected values come from the original per-group sort-and-slice trimmed_mean
+    def test_trims_k_from_each_tail(self):
+        self.assertEqual(_aggregate("trimmed_mean", 0.2), [
+            ["Bob", "T1", 70.0, 1], ["Cy", "T1", 66.67, 5], ["Ann", "T2", 60.0, 2], ["Dee", "T2", 31.25, 6],
+        ])
+        self.assertEqual(_aggregate("trimmed_mean", 0.4), [
+            ["Bob", "T1", 70.0, 1], ["Cy", "T1", 60.0, 5], ["Ann", "T2", 60.0, 2], ["Dee", "T2", 32.5, 6],
+        ])
+
+    def test_overtrimmed_groups_keep_every_score(self):
+        # k = int(n / 2): Ann (n=2) and Dee (n=6) have 2k >= n and fall back to the plain mean,
+        # while Cy (n=5) keeps only its median score
+        self.assertEqual(_aggregate("trimmed_mean", 0.5), [
+            ["Bob", "T1", 70.0, 1], ["Cy", "T1", 60.0, 5], ["Ann", "T2", 60.0, 2], ["Dee", "T2", 37.5, 6],
+        ])
+
+    def test_zero_fraction_is_the_mean(self):
+        self.assertEqual(_aggregate("trimmed_mean", 0.0), _aggregate("mean"))
+
+
+class AggregateTest(unittest.TestCase):
+    # One unsorted groupby per pass, then one sort by (Team, Evaluatee), as the sorted groupby produced
+    def test_mean_and_median(self):
+        self.assertEqual(_aggregate("mean"), [
+            ["Bob", "T1", 70.0, 1], ["Cy", "T1", 62.0, 5], ["Ann", "T2", 60.0, 2], ["Dee", "T2", 37.5, 6],
+        ])
+        self.assertEqual(_aggregate("median"), [
+            ["Bob", "T1", 70.0, 1], ["Cy", "T1", 60.0, 5], ["Ann", "T2", 60.0, 2], ["Dee", "T2", 32.5, 6],
+        ])
+
+    def test_unknown_method_is_the_mean(self):
+        self.assertEqual(_aggregate(" Bogus "), _aggregate("mean"))
+
+    def test_empty_frame(self):
+        result = scoring.aggregate_scores_df(EVALS.iloc[:0], "trimmed_mean", 0.2)
+        self.assertEqual(list(result.columns), ["Evaluatee", "Team", "Avg_Score_Pct", "N_Evals"])
+        self.assertTrue(result.empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+from werkzeug.datastructures import FileStorage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app as appmod  # noqa: E402
+
+# Excel exports often end every data row with a trailing comma
+TRAILING_COMMA_CSV = (
+    "first_name,last_name,email,team\n"
+    "A,One,a1@x.com,T1,\n"
+    "B,Two,b@x.com,T2\n"
+)
+EXPECTED_ROWS = [
+    {"first_name": "A", "last_name": "One", "email": "a1@x.com", "team": "T1"},
+    {"first_name": "B", "last_name": "Two", "email": "b@x.com", "team": "T2"},
+]
+
+
+def _upload(text):
+    return FileStorage(stream=io.BytesIO(text.encode("utf-8")), filename="students.csv")
+
+
+class TrailingCommaTest(unittest.TestCase):
+    def test_streamed_upload_keeps_fields_in_place(self):
+        chunks = list(appmod._iter_upload_csv(_upload(TRAILING_COMMA_CSV)))
+        rows = [row for df in chunks for row in appmod._student_rows(df)]
+        self.assertEqual(rows, EXPECTED_ROWS)
+
+    def test_c_engine_upload_keeps_fields_in_place(self):
+        with mock.patch.object(appmod, "CSV_ENGINE", "c"):
+            df = appmod._read_upload_csv(_upload(TRAILING_COMMA_CSV))
+        self.assertEqual(appmod._student_rows(df), EXPECTED_ROWS)
+
+    def test_default_engine_upload_keeps_fields_in_place(self):
+        # pyarrow (when installed) rejects the ragged row and the C parser takes over
+        df = appmod._read_upload_csv(_upload(TRAILING_COMMA_CSV))
+        self.assertEqual(appmod._student_rows(df), EXPECTED_ROWS)
+
+    def test_empty_upload_reads_as_none(self):
+        self.assertIsNone(appmod._read_upload_csv(_upload("")))
+
+    def test_unparsable_upload_raises(self):
+        with self.assertRaises(appmod.pd.errors.ParserError):
+            appmod._read_upload_csv(_upload('first_name,last_name\n"A,One\n'))
+
+
+if __name__ == "__main__":
+    unittest.main()